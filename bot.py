@@ -2,6 +2,7 @@ import os
 import logging
 import tempfile
 import zipfile
+from functools import lru_cache
 from time import gmtime, strftime
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
@@ -32,12 +33,18 @@ DOWNLOAD_PATH = os.environ.get("DOWNLOAD_PATH", "./downloads")
 # States for ConversationHandler
 CHOOSING, TYPING_REPLY, CHOOSING_QUALITY, ADDING_USER = range(4)
 
-# Store authorized users
-authorized_users = {OWNER_ID}
+# Authorized users, as an immutable snapshot: handlers only read it, and
+# authorize_user() swaps in a new set instead of mutating the one being read
+authorized_users = frozenset({OWNER_ID})
+
+def authorize_user(user_id: int):
+    global authorized_users
+    authorized_users = authorized_users | {user_id}
 
 # OrpheusDL instance
 orpheus = Orpheus()
 
+@lru_cache(maxsize=1024)
 def beauty_format_seconds(seconds: int) -> str:
     """Format seconds to human readable time."""
     time_data = gmtime(seconds)
@@ -1,5 +1,6 @@
 import asyncio
 import os
+import mutagen
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from utils.url_parser import parse_url
@@ -19,7 +20,7 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle incoming music URLs"""
     try:
         url = update.message.text
-        service, media_type, media_id = parse_url(url)
+        service, media_type, media_id = await parse_url(url)
         
         if not service:
             await update.message.reply_text(
@@ -135,11 +136,35 @@ async def _send_downloaded_file(update: Update, context: ContextTypes.DEFAULT_TY
         # Split file or send as document
         pass
     else:
-        await context.bot.send_audio(
-            chat_id=update.effective_chat.id,
-            audio=open(file_path, 'rb'),
-            caption="🎵 Here's your downloaded track!"
-        )
+        # Tag parsing touches the disk, keep it off the event loop so other chats aren't stalled
+        duration, title, performer = await asyncio.to_thread(_read_audio_meta, file_path)
+        with open(file_path, 'rb') as audio_file:
+            await context.bot.send_audio(
+                chat_id=update.effective_chat.id,
+                audio=audio_file,
+                filename=os.path.basename(file_path),
+                duration=duration,
+                title=title,
+                performer=performer,
+                caption="🎵 Here's your downloaded track!",
+                read_timeout=600,
+                write_timeout=600
+            )
+
+def _read_audio_meta(file_path: str):
+    """Read duration, title and artist from the file's tags so Telegram doesn't have to probe it"""
+    try:
+        audio = mutagen.File(file_path, easy=True)
+    except Exception:
+        audio = None
+    if audio is None:
+        return None, None, None
+
+    tags = audio.tags or {}
+    duration = int(audio.info.length) if getattr(audio.info, 'length', None) else None
+    title = tags.get('title', [None])[0]
+    performer = tags.get('artist', [None])[0]
+    return duration, title, performer
 
 def _is_quality_available(service: str, quality: str) -> bool:
     """Check if quality is available for given service"""
@@ -1,4 +1,5 @@
 import logging
+import os
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import (
     Application,
@@ -8,6 +9,7 @@ from telegram.ext import (
     ConversationHandler,
     filters,
 )
+from telegram.request import HTTPXRequest
 from config import BOT_TOKEN, OWNER_ID, AUTHORIZED_USERS
 from handlers import (
     start_handler,
@@ -16,8 +18,11 @@ from handlers import (
     download_handler,
     callback_handler
 )
-from utils.auth import check_auth
+from utils.auth import check_auth, init_auth_cache
+from utils.db_manager import DatabaseManager
 from utils.error_handler import error_handler
+from utils.url_parser import URLParser
+from utils.utils import create_aiohttp_session
 
 # Enable logging
 logging.basicConfig(
@@ -60,8 +65,34 @@ async def handle_url(update: Update, context):
 
 def main():
     """Start the bot"""
+    # Authorized users come from the database, with the config ids always allowed
+    db = DatabaseManager()
+    auth_cache = init_auth_cache(db)
+
+    async def post_init(application: Application):
+        auth_cache.start_refresh()
+        db.start_status_flusher()
+        # One shared session for expanding short links, owned by the application
+        URLParser.set_session(create_aiohttp_session(8))
+
+    async def post_shutdown(application: Application):
+        await auth_cache.stop_refresh()
+        await URLParser.close_session()
+        # Write out queued status updates before the connection goes away
+        await db.stop_status_flusher()
+        db.close()
+
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    # Larger pool for concurrent uploads; long timeouts are set per call on send_audio only
+    request = HTTPXRequest(connection_pool_size=32)
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .request(request)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
@@ -95,8 +126,17 @@ def main():
     # Add error handler
     application.add_error_handler(error_handler)
 
-    # Start the bot
-    application.run_polling()
+    # Start the bot: webhook when a public URL is configured, long polling otherwise
+    webhook_url = os.environ.get("WEBHOOK_URL")
+    if webhook_url:
+        application.run_webhook(
+            listen="0.0.0.0",
+            port=int(os.environ.get("PORT", 8443)),
+            webhook_url=webhook_url,
+            secret_token=os.environ.get("WEBHOOK_SECRET")
+        )
+    else:
+        application.run_polling()
 
 if __name__ == '__main__':
     main()
@@ -29,7 +29,8 @@ class MusicDownloader(ABC):
             async with session.get(url) as response:
                 if response.status == 200:
                     async with aiofiles.open(filename, mode='wb') as f:
-                        await f.write(await response.read())
+                        async for chunk in response.content.iter_chunked(64 * 1024):
+                            await f.write(chunk)
                 else:
                     raise DownloadError(f"Failed to download file. Status: {response.status}")
 
@@ -1,4 +1,5 @@
 import asyncio
+import re
 from utils.downloader import Downloader
 
 class BatchHandler:
@@ -8,6 +9,7 @@ class BatchHandler:
             'qobuz': qobuz_handler,
             'deezer': deezer_handler
         }
+        self._service_re = re.compile('|'.join(re.escape(service) for service in self.handlers))
         self.downloader = Downloader()
 
     async def batch_download(self, urls):
@@ -20,10 +22,8 @@ class BatchHandler:
         await asyncio.gather(*tasks)
 
     def detect_service(self, url):
-        for service, handler in self.handlers.items():
-            if service in url:
-                return service
-        return None
+        match = self._service_re.search(url)
+        return match.group(0) if match else None
 
     async def download_single(self, service, url):
         handler = self.handlers[service]
@@ -34,3 +34,6 @@ class BatchHandler:
             await handler.download_album(info['id'])
         elif info['type'] == 'playlist':
             await handler.download_playlist(info['id'])
+
+    async def close(self):
+        await self.downloader.close()
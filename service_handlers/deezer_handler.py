@@ -1,33 +1,65 @@
 import os
+import re
 import logging
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urlparse
+from mutagen.easyid3 import EasyID3
+from mutagen.flac import FLAC
+from mutagen.id3 import ID3, APIC
+from mutagen.mp3 import MP3
 from deezer_api import DeezerAPI
+from utils.concurrency import bounded_map
+from utils.constants import HTTP_POOL_LIMIT, COVER_CDN_CONC, PLAYLIST_DOWNLOAD_CONC
 from utils.models import TrackInfo, AlbumInfo, PlaylistInfo
+from utils.retry import retry_async
+from utils.utils import create_aiohttp_session
 from config import DOWNLOAD_PATH
 
 logger = logging.getLogger(__name__)
 
+# Optional locale prefix as in deezer.com/en/track/123
+_DEEZER_RE = re.compile(r'^/(?:[a-z]{2}(?:-[a-z]{2})?/)?(track|album|playlist|artist)/(\d+)')
+
+# quality -> (file extension, bitrate in kbps)
+_QUALITY_META: Dict[str, Tuple[str, int]] = {
+    'MP3_128': ('mp3', 128),
+    'MP3_320': ('mp3', 320),
+    'FLAC': ('flac', 1411)
+}
+
+COVER_CACHE_SIZE = 64
+COVER_STREAM_THRESHOLD = 2 * 1024 * 1024  # stream covers larger than 2MB instead of reading them in one go
+
 class DeezerHandler:
     def __init__(self, arl: str):
         self.api = DeezerAPI(arl)
-        self.supported_qualities = ['MP3_128', 'MP3_320', 'FLAC']
-        
+        self.supported_qualities = list(_QUALITY_META)
+        self._cover_session = None
+        self._cover_lru: OrderedDict[str, bytes] = OrderedDict()
+
+    async def _get_cover_session(self):
+        """Get the session used for the static cover art CDN"""
+        if self._cover_session is None or self._cover_session.closed:
+            self._cover_session = create_aiohttp_session(COVER_CDN_CONC, limit=HTTP_POOL_LIMIT)
+        return self._cover_session
+
+    async def close(self):
+        """Close the cover art session"""
+        if self._cover_session is not None:
+            await self._cover_session.close()
+            self._cover_session = None
+
     async def extract_deezer_id(self, url: str) -> Dict[str, Any]:
         """Extract media type and ID from Deezer URL"""
         try:
-            parsed = urlparse(url)
-            path_parts = parsed.path.strip('/').split('/')
-            
-            if len(path_parts) < 2:
+            match = _DEEZER_RE.match(urlparse(url).path)
+            if not match:
                 raise ValueError("Invalid Deezer URL")
-                
-            media_type = path_parts[0]
-            media_id = path_parts[1]
             
             return {
-                'type': media_type,  # track, album, playlist, artist
-                'id': media_id
+                'type': match.group(1),  # track, album, playlist, artist
+                'id': match.group(2)
             }
         except Exception as e:
             logger.error(f"Error extracting Deezer ID: {str(e)}")
@@ -36,7 +68,7 @@ class DeezerHandler:
     async def get_track_info(self, track_id: str) -> TrackInfo:
         """Get track information"""
         try:
-            track_data = await self.api.get_track(track_id)
+            track_data = await retry_async(self.api.get_track, track_id)
             
             return TrackInfo(
                 id=track_id,
@@ -56,7 +88,7 @@ class DeezerHandler:
     async def get_album_info(self, album_id: str) -> AlbumInfo:
         """Get album information"""
         try:
-            album_data = await self.api.get_album(album_id)
+            album_data = await retry_async(self.api.get_album, album_id)
             
             tracks = [track['id'] for track in album_data['tracks']['data']]
             
@@ -76,7 +108,7 @@ class DeezerHandler:
     async def get_playlist_info(self, playlist_id: str) -> PlaylistInfo:
         """Get playlist information"""
         try:
-            playlist_data = await self.api.get_playlist(playlist_id)
+            playlist_data = await retry_async(self.api.get_playlist, playlist_id)
             
             tracks = [track['id'] for track in playlist_data['tracks']['data']]
             
@@ -95,23 +127,24 @@ class DeezerHandler:
     async def download_track(self, track_id: str, quality: str = 'MP3_320') -> Dict[str, Any]:
         """Download a single track"""
         try:
-            if quality not in self.supported_qualities:
+            meta = _QUALITY_META.get(quality)
+            if meta is None:
                 raise ValueError(f"Unsupported quality: {quality}")
+            extension, bitrate = meta
 
             track_info = await self.get_track_info(track_id)
             
             # Get download URL
-            download_url = await self.api.get_track_download_url(track_id, quality)
+            download_url = await retry_async(self.api.get_track_download_url, track_id, quality)
             
             # Create filename
             filename = f"{track_info.artist} - {track_info.title}"
             filename = "".join(x for x in filename if x.isalnum() or x in (' ', '-', '_')).strip()
             
-            extension = 'mp3' if quality.startswith('MP3') else 'flac'
             file_path = os.path.join(DOWNLOAD_PATH, f"{filename}.{extension}")
             
-            # Download file
-            await self.api.download_file(download_url, file_path)
+            # Download file; the API wrapper decrypts the Blowfish-striped CDN stream
+            await retry_async(self.api.download_file, download_url, file_path)
             
             # Add metadata
             await self.add_metadata(file_path, track_info)
@@ -122,7 +155,8 @@ class DeezerHandler:
                 'title': track_info.title,
                 'artist': track_info.artist,
                 'duration': track_info.duration,
-                'quality': quality
+                'quality': quality,
+                'bitrate': bitrate
             }
             
         except Exception as e:
@@ -152,13 +186,12 @@ class DeezerHandler:
         """Download complete playlist"""
         try:
             playlist_info = await self.get_playlist_info(playlist_id)
-            results = []
             
-            for track_id in playlist_info.tracks:
-                result = await self.download_track(track_id, quality)
-                results.append(result)
-            
-            return results
+            return await bounded_map(
+                lambda track_id: self.download_track(track_id, quality),
+                playlist_info.tracks,
+                PLAYLIST_DOWNLOAD_CONC
+            )
             
         except Exception as e:
             logger.error(f"Error downloading playlist: {str(e)}")
@@ -167,10 +200,6 @@ class DeezerHandler:
     async def add_metadata(self, file_path: str, track_info: TrackInfo) -> None:
         """Add metadata to downloaded file"""
         try:
-            import mutagen
-            from mutagen.easyid3 import EasyID3
-            from mutagen.flac import FLAC
-            
             extension = os.path.splitext(file_path)[1].lower()
             
             if extension == '.mp3':
@@ -196,29 +225,43 @@ class DeezerHandler:
         except Exception as e:
             logger.error(f"Error adding metadata: {str(e)}")
 
-    async def add_cover_art(self, file_ path: str, cover_url: str) -> None:
+    async def add_cover_art(self, file_path: str, cover_url: str) -> None:
         """Add cover art to the downloaded file"""
         try:
-            import requests
-            from mutagen.mp3 import MP3
-            from mutagen.id3 import ID3, APIC
-
-            # Download cover art
-            response = requests.get(cover_url)
-            cover_path = f"{file_path}.cover.jpg"
-            with open(cover_path, 'wb') as cover_file:
-                cover_file.write(response.content)
+            # Tracks of the same album share a cover, so only the first one downloads it
+            cover_data = self._cover_lru.get(cover_url)
+            if cover_data is None:
+                cover_data = await retry_async(self._fetch_cover, cover_url)
+            self._cover_lru[cover_url] = cover_data
+            self._cover_lru.move_to_end(cover_url)
+            if len(self._cover_lru) > COVER_CACHE_SIZE:
+                self._cover_lru.popitem(last=False)
 
             # Add cover art to audio file
             audio = MP3(file_path, ID3=ID3)
-            with open(cover_path, 'rb') as cover_file:
-                audio.tags.add(APIC(
-                    encoding=3,  # 3 is for ID3v2.3
-                    mime='image/jpeg',  # image/jpeg or image/png
-                    type=3,  # 3 is for the cover image
-                    desc='Cover',
-                    data=cover_file.read()
-                ))
+            audio.tags.add(APIC(
+                encoding=3,  # 3 is for ID3v2.3
+                mime='image/jpeg',  # image/jpeg or image/png
+                type=3,  # 3 is for the cover image
+                desc='Cover',
+                data=cover_data
+            ))
             audio.save()
         except Exception as e:
             logger.error(f"Error adding cover art: {str(e)}")
+
+    async def _fetch_cover(self, cover_url: str) -> bytes:
+        """Download cover art from the image CDN"""
+        session = await self._get_cover_session()
+        async with session.head(cover_url, allow_redirects=True) as response:
+            size = response.content_length or 0
+
+        async with session.get(cover_url) as response:
+            response.raise_for_status()
+            if size <= COVER_STREAM_THRESHOLD:
+                return await response.read()
+
+            data = bytearray()
+            async for chunk in response.content.iter_chunked(256 * 1024):
+                data.extend(chunk)
+            return bytes(data)
@@ -1,4 +1,5 @@
 import os
+import re
 import logging
 from typing import Dict, Any, Optional, List
 from urllib.parse import urlparse
@@ -6,12 +7,20 @@ import asyncio
 import json
 from datetime import datetime
 
+import aiofiles
+
 from config import DOWNLOAD_PATH, TIDAL_CLIENT_ID, TIDAL_CLIENT_SECRET
+from utils.concurrency import bounded_map
+from utils.constants import PLAYLIST_DOWNLOAD_CONC
 from utils.models import TrackInfo, AlbumInfo, PlaylistInfo
+from utils.retry import retry_async
 from tidal_api import TidalAPI, TidalRequestError, SessionType
 
 logger = logging.getLogger(__name__)
 
+# Matches both tidal.com/browse/track/123 and listen.tidal.com/track/123
+_TIDAL_RE = re.compile(r'^/(?:browse/)?(track|album|playlist|mix)/([\w-]+)')
+
 class TidalHandler:
     def __init__(self, email: str = None, password: str = None):
         self.email = email
@@ -61,29 +70,19 @@ class TidalHandler:
         if not self.api:
             raise Exception("Not authenticated")
             
-        subscription = await self.api.get_subscription()
+        subscription = await retry_async(self.api.get_subscription, retry_on=(TidalRequestError,))
         return subscription.type
 
     async def extract_media_info(self, url: str) -> Dict[str, Any]:
         """Extract media type and ID from Tidal URL"""
         try:
-            parsed = urlparse(url)
-            path_parts = parsed.path.strip('/').split('/')
-            
-            if len(path_parts) < 2:
+            match = _TIDAL_RE.match(urlparse(url).path)
+            if not match:
                 raise ValueError("Invalid Tidal URL")
-                
-            media_type = path_parts[0]  # track, album, playlist, mix
-            media_id = path_parts[1]
-            
-            # Handle different URL formats
-            if media_type == 'browse':
-                media_type = path_parts[1]
-                media_id = path_parts[2]
             
             return {
-                'type': media_type,
-                'id': media_id
+                'type': match.group(1),  # track, album, playlist, mix
+                'id': match.group(2)
             }
         except Exception as e:
             logger.error(f"Error extracting Tidal info: {str(e)}")
@@ -92,7 +91,7 @@ class TidalHandler:
     async def get_track_info(self, track_id: str) -> TrackInfo:
         """Get track information"""
         try:
-            track_data = await self.api.get_track(track_id)
+            track_data = await retry_async(self.api.get_track, track_id, retry_on=(TidalRequestError,))
             
             # Get available qualities and formats
             available_formats = []
@@ -126,8 +125,8 @@ class TidalHandler:
     async def get_album_info(self, album_id: str) -> AlbumInfo:
         """Get album information"""
         try:
-            album_data = await self.api.get_album(album_id)
-            tracks_data = await self.api.get_album_tracks(album_id)
+            album_data = await retry_async(self.api.get_album, album_id, retry_on=(TidalRequestError,))
+            tracks_data = await retry_async(self.api.get_album_tracks, album_id, retry_on=(TidalRequestError,))
             
             tracks = [track['id'] for track in tracks_data['items']]
             
@@ -161,8 +160,8 @@ class TidalHandler:
     async def get_playlist_info(self, playlist_id: str) -> PlaylistInfo:
         """Get playlist information"""
         try:
-            playlist_data = await self.api.get_playlist(playlist_id)
-            tracks_data = await self.api.get_playlist_tracks(playlist_id)
+            playlist_data = await retry_async(self.api.get_playlist, playlist_id, retry_on=(TidalRequestError,))
+            tracks_data = await retry_async(self.api.get_playlist_tracks, playlist_id, retry_on=(TidalRequestError,))
             
             tracks = [track['id'] for track in tracks_data['items']]
             
@@ -195,16 +194,10 @@ class TidalHandler:
             
             # ```python
             # Logic to download the track
-            download_url = await self.api.get_download_url(track_id, quality, tidal_format)
+            download_url = await retry_async(self.api.get_download_url, track_id, quality, tidal_format,
+                                             retry_on=(TidalRequestError,))
             file_path = os.path.join(DOWNLOAD_PATH, f"{track_info.title}.{format.lower()}")
-            
-            async with aiofiles.open(file_path, 'wb') as f:
-                async with self.api.download_file(download_url) as response:
-                    while True:
-                        chunk = await response.content.read(1024)
-                        if not chunk:
-                            break
-                        await f.write(chunk)
+            await retry_async(self._download_to_file, download_url, file_path)
             
             return {
                 'status': 'success',
@@ -215,6 +208,15 @@ class TidalHandler:
             logger.error(f"Error downloading track: {str(e)}")
             raise
 
+    async def _download_to_file(self, url: str, file_path: str) -> None:
+        """Stream a file from the Tidal CDN to disk"""
+        # Through the API's own session, which carries the Authorization header
+        async with self.api.download_file(url) as response:
+            response.raise_for_status()
+            async with aiofiles.open(file_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    await f.write(chunk)
+
     async def download_album(self, album_id: str, quality: str = 'LOSSLESS', format: str = 'STEREO') -> List[Dict[str, Any]]:
         """Download all tracks in an album"""
         try:
@@ -234,13 +236,12 @@ class TidalHandler:
         """Download all tracks in a playlist"""
         try:
             playlist_info = await self.get_playlist_info(playlist_id)
-            download_results = []
             
-            for track_id in playlist_info.tracks:
-                result = await self.download_track(track_id, quality, format)
-                download_results.append(result)
-            
-            return download_results
+            return await bounded_map(
+                lambda track_id: self.download_track(track_id, quality, format),
+                playlist_info.tracks,
+                PLAYLIST_DOWNLOAD_CONC
+            )
         except Exception as e:
             logger.error(f"Error downloading playlist: {str(e)}")
             raise
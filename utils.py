@@ -1,34 +1,42 @@
 import os
+from functools import lru_cache
 from typing import Optional
 from telegram import Update
 from telegram.ext import CallbackContext
 from config import OWNER_ID, AUTHORIZED_USERS, DOWNLOAD_PATH
 
+# Built once at import; never mutated, so lookups need no locking
+_AUTHORIZED_IDS = frozenset(AUTHORIZED_USERS) | {OWNER_ID}
+
 def is_authorized(user_id: int) -> bool:
     """Check if user is authorized to use the bot."""
-    return user_id == OWNER_ID or user_id in AUTHORIZED_USERS
+    return user_id in _AUTHORIZED_IDS
+
+QUALITY_NAMES = {
+    'mqa': 'Master (MQA)',
+    'hifi': 'HiFi',
+    'high': 'High',
+    'medium': 'Medium',
+    'low': 'Low'
+}
+
+FORMAT_NAMES = {
+    'atmos': 'Dolby Atmos',
+    '360': 'Sony 360',
+    'flac': 'FLAC',
+    'aac': 'AAC',
+    'mp3': 'MP3'
+}
 
+@lru_cache(maxsize=64)
 def get_quality_name(quality_code: str) -> str:
     """Convert quality code to readable name."""
-    quality_names = {
-        'mqa': 'Master (MQA)',
-        'hifi': 'HiFi',
-        'high': 'High',
-        'medium': 'Medium',
-        'low': 'Low'
-    }
-    return quality_names.get(quality_code, quality_code.upper())
+    return QUALITY_NAMES.get(quality_code, quality_code.upper())
 
+@lru_cache(maxsize=64)
 def get_format_name(format_code: str) -> str:
     """Convert format code to readable name."""
-    format_names = {
-        'atmos': 'Dolby Atmos',
-        '360': 'Sony 360',
-        'flac': 'FLAC',
-        'aac': 'AAC',
-        'mp3': 'MP3'
-    }
-    return format_names.get(format_code, format_code.upper())
+    return FORMAT_NAMES.get(format_code, format_code.upper())
 
 def create_download_folder():
     """Create download folder if it doesn't exist."""
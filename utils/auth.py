@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import threading
+from typing import FrozenSet, Optional
+
+from config import OWNER_ID, AUTHORIZED_USERS
+
+logger = logging.getLogger(__name__)
+
+AUTH_REFRESH_INTERVAL = 30  # seconds
+
+# Users from the config are always allowed, whatever the database says
+_STATIC_IDS: FrozenSet[int] = frozenset(AUTHORIZED_USERS) | {OWNER_ID}
+
+class AuthCache:
+    """
+    Authorized user ids held as an immutable snapshot.
+
+    Lookups read the current frozenset without locking; writers build a new set
+    and swap it in under a lock, so readers never see a set that is changing size.
+    """
+
+    def __init__(self, db, refresh_interval: float = AUTH_REFRESH_INTERVAL):
+        self._db = db
+        self._refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._ids: FrozenSet[int] = _STATIC_IDS
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.refresh()
+
+    def contains(self, user_id: int) -> bool:
+        return user_id in self._ids
+
+    def refresh(self):
+        """Reload the authorized users from the database"""
+        ids = _STATIC_IDS | frozenset(self._db.get_authorized_user_ids())
+        with self._lock:
+            self._ids = ids
+
+    def add(self, user_id: int):
+        """Authorize a user, taking effect immediately rather than at the next refresh"""
+        self._db.add_authorized_user(user_id)
+        with self._lock:
+            self._ids = self._ids | {user_id}
+
+    def remove(self, user_id: int):
+        """Revoke a user immediately; config users can't be removed"""
+        if user_id in _STATIC_IDS:
+            return
+        self._db.remove_authorized_user(user_id)
+        with self._lock:
+            self._ids = self._ids - {user_id}
+
+    def start_refresh(self) -> asyncio.Task:
+        """Start refreshing from the database periodically; call from the running event loop"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return self._refresh_task
+
+    async def stop_refresh(self):
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error("Error refreshing authorized users: %s", e)
+
+auth_cache: Optional[AuthCache] = None
+
+def init_auth_cache(db) -> AuthCache:
+    """Create the shared AuthCache backed by the given DatabaseManager"""
+    global auth_cache
+    auth_cache = AuthCache(db)
+    return auth_cache
+
+def check_auth(user_id: int) -> bool:
+    """Check if user is authorized to use the bot"""
+    if auth_cache is not None:
+        return auth_cache.contains(user_id)
+    return user_id in _STATIC_IDS
@@ -1,9 +1,14 @@
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Optional
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
+import sys
 
-@dataclass
+# dataclass(slots=True) needs Python 3.10; older runtimes fall back to a regular __dict__
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class QueueItem:
     user_id: int
     file_url: str
@@ -15,7 +20,9 @@ class QueueItem:
 
 class QueueManager:
     def __init__(self):
-        self.queue: List[QueueItem] = []
+        # Each user's items run one at a time in order; different users are served round-robin
+        self.per_user: Dict[int, Deque[QueueItem]] = defaultdict(deque)
+        self.ready: Deque[int] = deque()  # users with pending items and no active download
         self.active_downloads: Dict[int, QueueItem] = {}
         self.max_concurrent = 3
 
@@ -28,15 +35,19 @@ class QueueManager:
             format=format,
             added_time=datetime.now()
         )
-        self.queue.append(item)
+        pending = self.per_user[user_id]
+        if not pending and user_id not in self.active_downloads:
+            self.ready.append(user_id)
+        pending.append(item)
         await self.process_queue()
         return item
 
     async def process_queue(self):
         """Process items in queue"""
-        while len(self.active_downloads) < self.max_concurrent and self.queue:
-            next_item = self.queue.pop(0)
-            self.active_downloads[next_item.user_id] = next_item
+        while len(self.active_downloads) < self.max_concurrent and self.ready:
+            user_id = self.ready.popleft()
+            next_item = self.per_user[user_id].popleft()
+            self.active_downloads[user_id] = next_item
             asyncio.create_task(self.process_download(next_item))
 
     async def process_download(self, item: QueueItem):
@@ -50,11 +61,17 @@ class QueueManager:
             item.status = 'failed'
         finally:
             del self.active_downloads[item.user_id]
+            if self.per_user[item.user_id]:
+                self.ready.append(item.user_id)
+            else:
+                del self.per_user[item.user_id]
             await self.process_queue()
 
     def get_user_position(self, user_id: int) -> Optional[int]:
         """Get user's position in queue"""
-        for i, item in enumerate(self.queue):
-            if item.user_id == user_id:
-                return i + 1
-        return None
+        if not self.per_user.get(user_id):
+            return None
+        if user_id in self.active_downloads:
+            # Goes back to the end of the rotation once the current download finishes
+            return len(self.ready) + 1
+        return self.ready.index(user_id) + 1
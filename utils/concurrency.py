@@ -0,0 +1,172 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Sequence, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+async def bounded_map(coro_fn: Callable[[T], Awaitable[R]], items: Sequence[T], limit: int) -> List[R]:
+    """
+    Await coro_fn(item) for every item with at most `limit` running at once.
+
+    A slot is acquired *before* each task is created, so only `limit` coroutines
+    exist at any time even for playlists with thousands of tracks. Results are
+    returned in input order; the first exception cancels the remaining work and
+    is re-raised.
+    """
+    results: List[R] = [None] * len(items)
+    semaphore = asyncio.Semaphore(limit)
+    pending = set()
+    error = None
+
+    async def run(index: int, item: T):
+        nonlocal error
+        try:
+            results[index] = await coro_fn(item)
+        except Exception as e:
+            if error is None:
+                error = e
+                # Stop the running siblings now instead of letting them finish first
+                current = asyncio.current_task()
+                for task in list(pending):
+                    if task is not current:
+                        task.cancel()
+        finally:
+            semaphore.release()
+
+    try:
+        for index, item in enumerate(items):
+            await semaphore.acquire()
+            if error is not None:
+                semaphore.release()
+                break
+            task = asyncio.create_task(run(index, item))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if error is not None:
+        raise error
+    return results
+
+
+class AdaptiveSemaphore:
+    """
+    Semaphore whose number of permits adapts to how the server copes (AIMD).
+
+    Permits grow by one after every `increase_every` successful operations up to
+    `maximum`, and are halved (never below `minimum`) when the caller reports an
+    overload signal such as a connection error, HTTP 429 or HTTP 503. A Retry-After
+    given to backoff() holds back every new acquire() until it has passed, for at
+    most `max_pause` seconds.
+
+    Only acquire() awaits; release and the feedback methods are synchronous, so a
+    task cancelled on its way out can never keep its permit.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 2, maximum: int = 12, increase_every: int = 10,
+                 max_pause: float = 60.0):
+        self._permits = initial
+        self._minimum = minimum
+        self._maximum = maximum
+        self._increase_every = increase_every
+        self._max_pause = max_pause
+        self._in_flight = 0
+        self._successes = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._resume_at = 0.0  # loop time before which no permit is handed out
+
+    @property
+    def permits(self) -> int:
+        return self._permits
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._resume_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if self._in_flight < self._permits:
+                break
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()  # we were woken for a free permit; hand it to the next waiter
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+
+    def release(self):
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        """Wake one waiter per free permit; each re-checks before taking it"""
+        free = self._permits - self._in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def record_success(self):
+        """Additive increase: one more permit every `increase_every` successes"""
+        self._successes += 1
+        if self._successes >= self._increase_every:
+            self._successes = 0
+            if self._permits < self._maximum:
+                self._permits += 1
+                self._wake()
+
+    def backoff(self, retry_after: float = 0):
+        """Multiplicative decrease; no new permit is handed out until Retry-After has passed"""
+        self._permits = max(self._minimum, self._permits // 2)
+        self._successes = 0
+        if retry_after > 0:
+            resume_at = asyncio.get_running_loop().time() + min(retry_after, self._max_pause)
+            self._resume_at = max(self._resume_at, resume_at)
+
+
+if __name__ == "__main__":
+    async def _check_bounded_map_cancels_siblings():
+        # The failure comes after every task has been scheduled
+        finished = []
+
+        async def job(delay):
+            if delay is None:
+                await asyncio.sleep(0.01)
+                raise ValueError("boom")
+            await asyncio.sleep(delay)
+            finished.append(delay)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await bounded_map(job, [None, 1, 1, 1], 4)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("bounded_map swallowed the error")
+        assert not finished, f"siblings ran to completion: {finished}"
+        assert loop.time() - started < 0.5, "error was raised only after the siblings finished"
+        print("bounded_map cancels siblings: ok")
+
+    asyncio.run(_check_bounded_map_cancels_siblings())
@@ -1,10 +1,15 @@
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from dataclasses import dataclass
 from pathlib import Path
-import json
+import orjson
+
+# path -> (mtime_ns, parsed config); an edited file replaces its own entry when re-read
+_config_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
 
 @dataclass
 class ConfigValidationError:
+    __slots__ = ('field', 'message')
+
     field: str
     message: str
 
@@ -23,14 +28,21 @@ class ConfigValidator:
         """Validate configuration file"""
         errors = []
         
-        if not self.config_path.exists():
+        try:
+            stat = self.config_path.stat()
+        except FileNotFoundError:
             return [ConfigValidationError('config', 'Configuration file not found')]
 
-        try:
-            with open(self.config_path, 'r') as f:
-                config = json.load(f)
-        except json.JSONDecodeError:
-            return [ConfigValidationError('config', 'Invalid JSON format')]
+        path = str(self.config_path)
+        cached = _config_cache.get(path)
+        if cached is not None and cached[0] == stat.st_mtime_ns:
+            config = cached[1]
+        else:
+            try:
+                config = orjson.loads(self.config_path.read_bytes())
+            except orjson.JSONDecodeError:
+                return [ConfigValidationError('config', 'Invalid JSON format')]
+            _config_cache[path] = (stat.st_mtime_ns, config)
 
         for field, field_type in self.required_fields.items():
             if field not in config:
@@ -58,5 +70,4 @@ class ConfigValidator:
             }
         }
         
-        with open(self.config_path, 'w') as f:
-            json.dump(default_config, f, indent=4)
+        self.config_path.write_bytes(orjson.dumps(default_config, option=orjson.OPT_INDENT_2))
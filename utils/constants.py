@@ -1,4 +1,6 @@
+import re
 from enum import Enum
+from typing import Optional
 
 class DownloadStatus(Enum):
     PENDING = "pending"
@@ -53,6 +55,21 @@ SUPPORTED_SOURCES = {
     'deezer.com': 'Deezer'
 }
 
+# All source domains in one alternation, so a URL is scanned once instead of once per domain
+_SOURCE_RE = re.compile('|'.join(re.escape(domain) for domain in SUPPORTED_SOURCES))
+
+def detect_source(url: str) -> Optional[str]:
+    """Return the display name of the music source a URL belongs to, if supported"""
+    match = _SOURCE_RE.search(url)
+    return SUPPORTED_SOURCES[match.group(0)] if match else None
+
+# Per-host connection limits for the aiohttp sessions used by the service handlers
+HTTP_POOL_LIMIT = 256
+COVER_CDN_CONC = 32  # cover art is served from static image CDNs which tolerate more parallelism
+
+# Tracks of a playlist downloaded in parallel
+PLAYLIST_DOWNLOAD_CONC = 4
+
 # Quality settings
 QUALITY_SETTINGS = {
     AudioQuality.LOW: {
@@ -1,19 +1,108 @@
+import asyncio
 import sqlite3
+import threading
+from itertools import groupby
+from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import json
-from datetime import datetime
+import logging
+import cachetools
+
+logger = logging.getLogger(__name__)
+
+_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536'
+)
+
+# Statements shared by every call; sqlite caches the compiled form per connection by SQL text.
+# Timestamps come from CURRENT_TIMESTAMP (UTC), like the schema defaults.
+_SQL_ADD_DOWNLOAD = '''
+    INSERT INTO downloads 
+    (user_id, file_url, file_path, file_size, format, quality, status) 
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_STATUS_COMPLETED = 'UPDATE downloads SET status = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?'
+_SQL_STATUS_OTHER = 'UPDATE downloads SET status = ?, error_message = ? WHERE id = ?'
+_SQL_HISTORY = '''
+    SELECT * FROM downloads 
+    WHERE user_id = ? 
+    ORDER BY created_at DESC 
+    LIMIT ?
+'''
+_SQL_ACTIVE = '''
+    SELECT * FROM downloads 
+    WHERE user_id = ? AND status IN ('pending', 'downloading')
+    ORDER BY created_at DESC
+'''
+_SQL_STATS = '''
+    SELECT status, COUNT(*), SUM(file_size) FROM downloads 
+    WHERE user_id = ? 
+    GROUP BY status
+'''
+
+STATUS_BATCH_SIZE = 100
+STATUS_FLUSH_INTERVAL = 0.1  # seconds
+STATUS_WRITE_ATTEMPTS = 3
 
 class DatabaseManager:
     def __init__(self, db_path: str = 'data/bot.db'):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One long-lived connection shared by every call, serialised by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        for pragma in _PRAGMAS:
+            self._conn.execute(pragma)
+
+        # Short-lived caches for the per-update user lookups, invalidated on every write
+        self._cache_lock = threading.Lock()
+        self._user_cache = cachetools.TTLCache(maxsize=10000, ttl=60)
+        self._settings_cache = cachetools.TTLCache(maxsize=10000, ttl=60)
+
+        # Write-behind queue for download status updates, see start_status_flusher()
+        self._status_q: Optional[asyncio.Queue] = None
+        self._status_flusher_task: Optional[asyncio.Task] = None
+
         self.init_db()
 
+    def _invalidate_user(self, user_id: int):
+        """Drop cached user and settings rows after a write"""
+        with self._cache_lock:
+            self._user_cache.pop(user_id, None)
+            self._settings_cache.pop(user_id, None)
+
+    @contextmanager
+    def _cursor(self, transaction: bool = False):
+        """Yield a cursor on the shared connection, optionally inside a transaction"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                if transaction:
+                    cursor.execute('BEGIN')
+                yield cursor
+                if transaction:
+                    cursor.execute('COMMIT')
+            except BaseException:
+                if transaction and self._conn.in_transaction:
+                    cursor.execute('ROLLBACK')
+                raise
+            finally:
+                cursor.close()
+
+    def close(self):
+        """Close the shared database connection"""
+        with self._lock:
+            self._conn.close()
+
     def init_db(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor(transaction=True) as cursor:
             
             # Users table
             cursor.execute('''
@@ -29,6 +118,14 @@ class DatabaseManager:
                 )
             ''')
 
+            # Users allowed to use the bot, in addition to the ids from the config
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS authorized_users (
+                    user_id INTEGER PRIMARY KEY,
+                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
             # Downloads table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS downloads (
@@ -47,6 +144,16 @@ class DatabaseManager:
                 )
             ''')
 
+            # History/active lookups filter by user and sort by date or filter by status
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_downloads_user_created
+                ON downloads (user_id, created_at DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_downloads_user_status
+                ON downloads (user_id, status)
+            ''')
+
             # Settings table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS settings (
@@ -59,17 +166,14 @@ class DatabaseManager:
                 )
             ''')
 
-            conn.commit()
-
     def add_user(self, user_id: int, username: str, first_name: str = None, last_name: str = None):
         """Add or update user in database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor(transaction=True) as cursor:
             cursor.execute('''
                 INSERT OR REPLACE INTO users 
-                (user_id, username, first_name, last_name, last_active) 
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, username, first_name, last_name, datetime.now()))
+                (user_id, username, first_name, last_name) 
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, username, first_name, last_name))
             
             # Initialize user settings if new user
             cursor.execute('''
@@ -77,20 +181,23 @@ class DatabaseManager:
                 (user_id, preferred_quality, preferred_format) 
                 VALUES (?, ?, ?)
             ''', (user_id, 'HIGH', 'MP3'))
-            
-            conn.commit()
+        self._invalidate_user(user_id)
 
     def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user information"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cache_lock:
+            user = self._user_cache.get(user_id)
+        if user is not None:
+            return user
+
+        with self._cursor() as cursor:
             result = cursor.execute(
                 'SELECT * FROM users WHERE user_id = ?',
                 (user_id,)
             ).fetchone()
             
             if result:
-                return {
+                user = {
                     'user_id': result[0],
                     'username': result[1],
                     'first_name': result[2],
@@ -100,12 +207,29 @@ class DatabaseManager:
                     'created_at': result[6],
                     'last_active': result[7]
                 }
+                with self._cache_lock:
+                    self._user_cache[user_id] = user
+                return user
             return None
 
+    def get_authorized_user_ids(self) -> List[int]:
+        """Get the ids of all users granted access"""
+        with self._cursor() as cursor:
+            return [row[0] for row in cursor.execute('SELECT user_id FROM authorized_users')]
+
+    def add_authorized_user(self, user_id: int):
+        """Grant a user access"""
+        with self._cursor(transaction=True) as cursor:
+            cursor.execute('INSERT OR IGNORE INTO authorized_users (user_id) VALUES (?)', (user_id,))
+
+    def remove_authorized_user(self, user_id: int):
+        """Revoke a user's access"""
+        with self._cursor(transaction=True) as cursor:
+            cursor.execute('DELETE FROM authorized_users WHERE user_id = ?', (user_id,))
+
     def update_user_settings(self, user_id: int, settings: Dict[str, Any]):
         """Update user settings"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor(transaction=True) as cursor:
             cursor.execute(
                 'UPDATE settings SET preferred_quality=?, preferred_format=?, auto_download=?, notifications=? WHERE user_id=?',
                 (
@@ -116,59 +240,89 @@ class DatabaseManager:
                     user_id
                 )
             )
-            conn.commit()
+        self._invalidate_user(user_id)
 
     def add_download(self, user_id: int, file_url: str, file_path: str, 
                     file_size: int, format: str, quality: str):
         """Record new download"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO downloads 
-                (user_id, file_url, file_path, file_size, format, quality, status) 
-                VALUES (?, ?, ?, ?,
-                
-    def add_download(self, user_id: int, file_url: str, file_path: str, 
-                    file_size: int, format: str, quality: str):
-        """Record new download"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO downloads 
-                (user_id, file_url, file_path, file_size, format, quality, status) 
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, file_url, file_path, file_size, format, quality, 'pending'))
-            conn.commit()
+        with self._cursor(transaction=True) as cursor:
+            cursor.execute(_SQL_ADD_DOWNLOAD, (user_id, file_url, file_path, file_size, format, quality, 'pending'))
             return cursor.lastrowid
 
     def update_download_status(self, download_id: int, status: str, error_message: str = None):
-        """Update download status"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            if status == 'completed':
-                cursor.execute('''
-                    UPDATE downloads 
-                    SET status = ?, completed_at = ? 
-                    WHERE id = ?
-                ''', (status, datetime.now(), download_id))
-            else:
-                cursor.execute('''
-                    UPDATE downloads 
-                    SET status = ?, error_message = ? 
-                    WHERE id = ?
-                ''', (status, error_message, download_id))
-            conn.commit()
+        """Update download status, batched through the status flusher when it is running"""
+        if status == 'completed':
+            update = (_SQL_STATUS_COMPLETED, (status, download_id))
+        else:
+            update = (_SQL_STATUS_OTHER, (status, error_message, download_id))
+
+        if self._status_flusher_task is not None and not self._status_flusher_task.done():
+            self._status_q.put_nowait(update)
+        else:
+            self._write_status_batch([update])
+
+    def _write_status_batch(self, batch: List[tuple]):
+        """Apply queued status updates in order, one executemany per run of the same statement"""
+        with self._cursor(transaction=True) as cursor:
+            for sql, group in groupby(batch, key=lambda update: update[0]):
+                cursor.executemany(sql, [params for _, params in group])
+
+    def start_status_flusher(self) -> asyncio.Task:
+        """Start coalescing status updates; call once from the running event loop at bot startup"""
+        if self._status_flusher_task is None or self._status_flusher_task.done():
+            self._status_q = asyncio.Queue()
+            self._status_flusher_task = asyncio.create_task(self._status_flusher())
+        return self._status_flusher_task
+
+    async def stop_status_flusher(self):
+        """Stop the flusher after it has written everything queued so far"""
+        task, self._status_flusher_task = self._status_flusher_task, None
+        if task is None or task.done():
+            return
+        self._status_q.put_nowait(None)
+        await task
+
+    async def _status_flusher(self):
+        """Write queued status updates every 100 ms or every 100 rows, whichever comes first"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            update = await self._status_q.get()
+            if update is None:
+                return
+            batch = [update]
+            deadline = loop.time() + STATUS_FLUSH_INTERVAL
+            while len(batch) < STATUS_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    update = await asyncio.wait_for(self._status_q.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if update is None:
+                    stopping = True
+                    break
+                batch.append(update)
+            await self._flush_status_batch(batch)
+
+    async def _flush_status_batch(self, batch: List[tuple]):
+        """Write a batch, retrying failed writes; a batch that keeps failing is logged and dropped"""
+        for attempt in range(1, STATUS_WRITE_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(self._write_status_batch, batch)
+                return
+            except Exception as e:
+                if attempt == STATUS_WRITE_ATTEMPTS:
+                    logger.error("Dropping %d status updates after %d failed writes: %s", len(batch), attempt, e)
+                    return
+                logger.warning("Writing %d status updates failed, retrying: %s", len(batch), e)
+                await asyncio.sleep(STATUS_FLUSH_INTERVAL * 2 ** attempt)
 
     def get_download_history(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """Get user's download history"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            results = cursor.execute('''
-                SELECT * FROM downloads 
-                WHERE user_id = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            ''', (user_id, limit)).fetchall()
+        with self._cursor() as cursor:
+            results = cursor.execute(_SQL_HISTORY, (user_id, limit)).fetchall()
             
             return [{
                 'id': row[0],
@@ -185,13 +339,8 @@ class DatabaseManager:
 
     def get_active_downloads(self, user_id: int) -> List[Dict[str, Any]]:
         """Get user's active downloads"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            results = cursor.execute('''
-                SELECT * FROM downloads 
-                WHERE user_id = ? AND status IN ('pending', 'downloading')
-                ORDER BY created_at DESC
-            ''', (user_id,)).fetchall()
+        with self._cursor() as cursor:
+            results = cursor.execute(_SQL_ACTIVE, (user_id,)).fetchall()
             
             return [{
                 'id': row[0],
@@ -203,8 +352,12 @@ class DatabaseManager:
 
     def get_user_settings(self, user_id: int) -> Dict[str, Any]:
         """Get user settings"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cache_lock:
+            settings = self._settings_cache.get(user_id)
+        if settings is not None:
+            return settings
+
+        with self._cursor() as cursor:
             result = cursor.execute('''
                 SELECT preferred_quality, preferred_format, auto_download, notifications 
                 FROM settings 
@@ -212,68 +365,52 @@ class DatabaseManager:
             ''', (user_id,)).fetchone()
             
             if result:
-                return {
+                settings = {
                     'preferred_quality': result[0],
                     'preferred_format': result[1],
                     'auto_download': bool(result[2]),
                     'notifications': bool(result[3])
                 }
+                with self._cache_lock:
+                    self._settings_cache[user_id] = settings
+                return settings
             return None
 
     def update_last_active(self, user_id: int):
         """Update user's last active timestamp"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor(transaction=True) as cursor:
             cursor.execute('''
                 UPDATE users 
-                SET last_active = ? 
+                SET last_active = CURRENT_TIMESTAMP 
                 WHERE user_id = ?
-            ''', (datetime.now(), user_id))
-            conn.commit()
+            ''', (user_id,))
+        with self._cache_lock:
+            self._user_cache.pop(user_id, None)
 
     def get_download_stats(self, user_id: int) -> Dict[str, Any]:
         """Get user's download statistics"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Total downloads
-            total = cursor.execute('''
-                SELECT COUNT(*) FROM downloads 
-                WHERE user_id = ?
-            ''', (user_id,)).fetchone()[0]
-            
-            # Downloads by status
-            status_counts = cursor.execute('''
-                SELECT status, COUNT(*) FROM downloads 
-                WHERE user_id = ? 
-                GROUP BY status
-            ''', (user_id,)).fetchall()
-            
-            # Total downloaded size
-            total_size = cursor.execute('''
-                SELECT SUM(file_size) FROM downloads 
-                WHERE user_id = ? AND status = 'completed'
-            ''', (user_id,)).fetchone()[0] or 0
-            
-            return {
-                'total_downloads': total,
-                'status_counts': dict(status_counts),
-                'total_size': total_size
-            }
+        with self._cursor() as cursor:
+            # One pass over the user's rows; totals are summed up from the per-status groups
+            rows = cursor.execute(_SQL_STATS, (user_id,)).fetchall()
+
+        status_counts = {status: count for status, count, _ in rows}
+        total_size = next((size for status, _, size in rows if status == 'completed'), None) or 0
+
+        return {
+            'total_downloads': sum(status_counts.values()),
+            'status_counts': status_counts,
+            'total_size': total_size
+        }
 
     def clear_old_downloads(self, days: int = 30):
         """Clear download records older than specified days"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor(transaction=True) as cursor:
             cursor.execute('''
                 DELETE FROM downloads 
                 WHERE created_at < datetime('now', ?)
             ''', (f'-{days} days',))
-            conn.commit()
 
     def optimize_database(self):
         """Optimize database by cleaning up and vacuuming"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor() as cursor:
             cursor.execute('VACUUM')
-            conn.commit()
@@ -1,21 +1,71 @@
 import asyncio
-from typing import Optional, Callable
+import os
+from typing import Optional, Callable, List, Set, Tuple
 from pathlib import Path
 import aiohttp
+import aiofiles
 from .progress import ProgressTracker
 from .models import DownloadRequest
+from .concurrency import AdaptiveSemaphore, bounded_map
+from .retry import retry_after_seconds
+from .utils import create_aiohttp_session, silentremove
+
+WRITE_QUEUE_DEPTH = 8  # chunks buffered between the network reader and the disk writer
+CHUNK_SIZE = 64 * 1024
+OVERLOAD_STATUSES = (429, 503)
+
+
+class _RangeNotSupported(Exception):
+    """Raised when the server answers a range request with the full body"""
+
 
 class DownloadManager:
-    def __init__(self, max_concurrent_downloads: int = 3):
-        self.semaphore = asyncio.Semaphore(max_concurrent_downloads)
+    def __init__(self, max_concurrent_downloads: int = 12):
+        self.max_concurrent_downloads = max_concurrent_downloads
+        # Starts at 4 parallel downloads and adapts between 2 and max_concurrent_downloads
+        self.semaphore = AdaptiveSemaphore(
+            initial=min(4, max_concurrent_downloads),
+            minimum=min(2, max_concurrent_downloads),
+            maximum=max_concurrent_downloads
+        )
         self.active_downloads: dict = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the long-lived session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # Every download can have DownloadRequest.parts ranges open against the same CDN host,
+            # so the per-host pool must cover all of them at the adaptive maximum
+            connections = self.max_concurrent_downloads * DownloadRequest.parts
+            self._session = create_aiohttp_session(
+                connections,
+                limit=connections,
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=60)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def download(self, 
                       request: DownloadRequest, 
                       progress_callback: Optional[Callable] = None) -> str:
         """Handle download with concurrency control"""
         async with self.semaphore:
-            return await self._download_file(request, progress_callback)
+            try:
+                result = await self._download_file(request, progress_callback)
+            except aiohttp.ClientConnectorError:
+                self.semaphore.backoff()
+                raise
+            except aiohttp.ClientResponseError as e:
+                if e.status in OVERLOAD_STATUSES:
+                    self.semaphore.backoff(retry_after_seconds(e) or 0)
+                raise
+            self.semaphore.record_success()
+            return result
 
     async def _download_file(self, 
                            request: DownloadRequest,
@@ -24,28 +74,261 @@ class DownloadManager:
         output_path = Path(request.output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(request.url) as response:
-                if response.status != 200:
+        session = await self._get_session()
+
+        if request.parts > 1 and hasattr(os, 'pwrite'):
+            # Ask for the first range straight away instead of probing with HEAD: a 206 reports
+            # the full size in Content-Range, and a 200 means the body is simply the whole file
+            async with session.get(request.url, headers={'Range': f'bytes=0-{request.chunk_size - 1}'}) as response:
+                if response.status == 200:
+                    return await self._stream_response(response, request, output_path, progress_callback)
+                if response.status != 206:
+                    response.raise_for_status()
                     raise Exception(f"Download failed with status {response.status}")
 
-                total_size = int(response.headers.get('content-length', 0))
-                chunk_size = 64 * 1024  # 64KB chunks
-                downloaded = 0
-
-                with open(output_path, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(chunk_size):
-                        if request.cancelled:
-                            raise Exception("Download cancelled")
-                        
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if progress_callback:
-                            await progress_callback(downloaded, total_size)
+                total_size = self._range_total(response)
+                if total_size is not None and total_size <= request.chunk_size:
+                    # The first range is the whole file
+                    return await self._stream_response(response, request, output_path, progress_callback)
+                if total_size is not None:
+                    try:
+                        await self._download_ranges(session, request, output_path, total_size,
+                                                    progress_callback, response)
+                        return str(output_path)
+                    except _RangeNotSupported:
+                        pass  # fall back to a single stream
+
+        async with session.get(request.url) as response:
+            if response.status != 200:
+                response.raise_for_status()
+                raise Exception(f"Download failed with status {response.status}")
+            return await self._stream_response(response, request, output_path, progress_callback)
+
+    async def _stream_response(self,
+                               response: aiohttp.ClientResponse,
+                               request: DownloadRequest,
+                               output_path: Path,
+                               progress_callback: Optional[Callable]) -> str:
+        """Write a whole response body to output_path"""
+        total_size = int(response.headers.get('content-length', 0))
+        downloaded = 0
+
+        # Disk writes run in their own task so receiving the next chunk overlaps writing the last one
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_DEPTH)
+        if total_size and hasattr(os, 'pwrite'):
+            writer = asyncio.create_task(self._pwriter(write_queue, output_path, total_size))
+        else:
+            writer = asyncio.create_task(self._writer(write_queue, output_path))
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                if request.cancelled:
+                    raise Exception("Download cancelled")
+                await self._enqueue(write_queue, chunk, writer)
+                downloaded += len(chunk)
+                
+                if progress_callback:
+                    await progress_callback(downloaded, total_size)
+
+            await self._enqueue(write_queue, None, writer)
+            await writer
+        except BaseException:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+            silentremove(output_path)
+            raise
 
         return str(output_path)
 
+    @staticmethod
+    def _range_total(response: aiohttp.ClientResponse) -> Optional[int]:
+        """Full size from a 206's Content-Range ('bytes 0-1023/146515'), None if the server didn't say"""
+        total = response.headers.get('Content-Range', '').rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+
+    async def _download_ranges(self,
+                               session: aiohttp.ClientSession,
+                               request: DownloadRequest,
+                               output_path: Path,
+                               total_size: int,
+                               progress_callback: Optional[Callable],
+                               first_response: aiohttp.ClientResponse):
+        """
+        Download the file as parallel byte ranges written in place into a preallocated file.
+
+        first_response is the already open 206 for the first range.
+        """
+        spans = [(start, min(start + request.chunk_size, total_size) - 1)
+                 for start in range(0, total_size, request.chunk_size)]
+        downloaded = 0
+
+        async def on_chunk(size: int):
+            nonlocal downloaded
+            downloaded += size
+            if progress_callback:
+                await progress_callback(downloaded, total_size)
+
+        writes: Set[asyncio.Future] = set()
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            self._preallocate(fd, total_size)
+            async def fetch(span: Tuple[int, int]):
+                if span[0] == 0:
+                    await self._write_range(first_response, request, fd, writes, 0, on_chunk)
+                else:
+                    await self._download_range(session, request, fd, writes, span[0], span[1], on_chunk)
+
+            await bounded_map(
+                fetch,
+                spans,
+                request.parts
+            )
+        except BaseException:
+            await self._close_after_writes(fd, writes)
+            silentremove(output_path)
+            raise
+        await self._close_after_writes(fd, writes)
+
+    @staticmethod
+    async def _download_range(session: aiohttp.ClientSession,
+                              request: DownloadRequest,
+                              fd: int,
+                              writes: Set[asyncio.Future],
+                              start: int,
+                              end: int,
+                              on_chunk: Callable):
+        """Fetch bytes start..end (inclusive) and pwrite them at their offset"""
+        async with session.get(request.url, headers={'Range': f'bytes={start}-{end}'}) as response:
+            if response.status == 200:
+                raise _RangeNotSupported()
+            if response.status != 206:
+                response.raise_for_status()
+                raise Exception(f"Download failed with status {response.status}")
+            await DownloadManager._write_range(response, request, fd, writes, start, on_chunk)
+
+    @staticmethod
+    async def _write_range(response: aiohttp.ClientResponse,
+                           request: DownloadRequest,
+                           fd: int,
+                           writes: Set[asyncio.Future],
+                           offset: int,
+                           on_chunk: Callable):
+        """pwrite a range response's body starting at offset"""
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if request.cancelled:
+                raise Exception("Download cancelled")
+            await DownloadManager._write_at(writes, os.pwrite, fd, chunk, offset)
+            offset += len(chunk)
+            await on_chunk(len(chunk))
+
+    @staticmethod
+    async def _write_at(writes: Set[asyncio.Future], write: Callable, *args):
+        """
+        Run a blocking positional write in the executor, tracked in writes.
+
+        The write is shielded: cancelling the caller can't stop a thread that has
+        already started, so the fd must stay open until _close_after_writes sees it finish.
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, write, *args)
+        writes.add(future)
+        future.add_done_callback(writes.discard)
+        await asyncio.shield(future)
+
+    @staticmethod
+    async def _close_after_writes(fd: int, writes: Set[asyncio.Future]):
+        """Close fd once every write handed to the executor has finished"""
+        if not writes:
+            os.close(fd)
+            return
+        # Closed from a callback, so even a second cancellation of the caller can't close it early
+        pending = asyncio.gather(*writes, return_exceptions=True)
+        pending.add_done_callback(lambda _: os.close(fd))
+        await asyncio.shield(pending)
+
+    @staticmethod
+    def _preallocate(fd: int, size: int):
+        """Reserve the whole file up front so writes don't keep extending it"""
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.ftruncate(fd, size)
+
+    @staticmethod
+    async def _enqueue(write_queue: asyncio.Queue, chunk: Optional[bytes], writer: asyncio.Task):
+        """
+        Hand chunk to the writer, raising the writer's error if it dies first.
+
+        The queue is full whenever the disk is slower than the network, and a dead
+        writer never drains it, so a plain put() could wait forever.
+        """
+        if writer.done():
+            await writer  # re-raises the write error
+        if not write_queue.full():
+            write_queue.put_nowait(chunk)
+            return
+        put = asyncio.ensure_future(write_queue.put(chunk))
+        try:
+            await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        if not put.done() or put.cancelled():
+            await writer  # re-raises the write error
+            raise Exception("Disk writer stopped before the download finished")
+
+    @staticmethod
+    async def _next_batch(write_queue: asyncio.Queue) -> Tuple[List[bytes], bool]:
+        """
+        Wait for a chunk, then take every chunk already queued behind it.
+
+        Returns the chunks and whether the None sentinel was reached, so the
+        writers issue one write per batch instead of one per network chunk.
+        """
+        chunk = await write_queue.get()
+        if chunk is None:
+            return [], True
+        batch = [chunk]
+        while not write_queue.empty():
+            chunk = write_queue.get_nowait()
+            if chunk is None:
+                return batch, True
+            batch.append(chunk)
+        return batch, False
+
+    @classmethod
+    async def _pwriter(cls, write_queue: asyncio.Queue, output_path: Path, total_size: int):
+        """Write queued chunks at their offsets into a preallocated file until a None sentinel arrives"""
+        loop = asyncio.get_running_loop()
+        writes: Set[asyncio.Future] = set()
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            cls._preallocate(fd, total_size)
+            offset = 0
+            finished = False
+            while not finished:
+                batch, finished = await cls._next_batch(write_queue)
+                if not batch:
+                    continue
+                if hasattr(os, 'pwritev'):
+                    await cls._write_at(writes, os.pwritev, fd, batch, offset)
+                else:
+                    await cls._write_at(writes, os.pwrite, fd, b''.join(batch), offset)
+                offset += sum(map(len, batch))
+            if offset != total_size:
+                # Content-Length described an encoded body; trim to what was actually written
+                os.ftruncate(fd, offset)
+        finally:
+            await cls._close_after_writes(fd, writes)
+
+    @classmethod
+    async def _writer(cls, write_queue: asyncio.Queue, output_path: Path):
+        """Write queued chunks to disk until a None sentinel arrives"""
+        async with aiofiles.open(output_path, 'wb') as f:
+            finished = False
+            while not finished:
+                batch, finished = await cls._next_batch(write_queue)
+                if batch:
+                    await f.write(b''.join(batch) if len(batch) > 1 else batch[0])
+
     def cancel_download(self, download_id: str):
         """Cancel an active download"""
         if download_id in self.active_downloads:
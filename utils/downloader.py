@@ -1,10 +1,29 @@
 import asyncio
+import time
 import aiohttp
+import aiofiles
 from utils.progress import ProgressBar
+from utils.utils import create_aiohttp_session
+
+CHUNK_SIZE = 1 << 18  # 256KB
+PROGRESS_INTERVAL = 0.25  # seconds between progress updates
 
 class Downloader:
     def __init__(self):
         self.tasks = {}
+        self._session = None
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = create_aiohttp_session(
+                8, timeout=aiohttp.ClientTimeout(total=None, sock_read=60)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def download(self, url, filename, total_size):
         task = asyncio.create_task(self._download(url, filename, total_size))
@@ -13,15 +32,28 @@ class Downloader:
 
     async def _download(self, url, filename, total_size):
         progress = ProgressBar(total=total_size)
-        async with aiohttp.ClientSession() as session:
+        session = await self._get_session()
+        try:
             async with session.get(url) as response:
-                with open(filename, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(1024):
+                async with aiofiles.open(filename, 'wb') as f:
+                    pending = 0
+                    last_tick = time.monotonic()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
                         if asyncio.current_task().cancelled():
                             raise asyncio.CancelledError
-                        f.write(chunk)
-                        await progress.update(len(chunk))
-        progress.close()
+                        await f.write(chunk)
+
+                        # Report progress in batches rather than per chunk
+                        pending += len(chunk)
+                        now = time.monotonic()
+                        if now - last_tick >= PROGRESS_INTERVAL:
+                            await progress.update(pending)
+                            pending = 0
+                            last_tick = now
+                    if pending:
+                        await progress.update(pending)
+        finally:
+            progress.close()
 
     def cancel_download(self, filename):
         if filename in self.tasks:
@@ -17,25 +17,19 @@ logger = logging.getLogger(__name__)
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle errors occurred in the bot"""
+    error = context.error
+    # Walk the MRO so subclasses of a registered error get its handler
+    handler = next(
+        (ERROR_HANDLERS[cls] for cls in type(error).__mro__ if cls in ERROR_HANDLERS),
+        handle_general_error
+    )
     try:
-        raise context.error
-    except InvalidURLError as e:
-        await handle_invalid_url_error(update, str(e))
-    except DownloadError as e:
-        await handle_download_error(update, str(e))
-    except RateLimitError as e:
-        await handle_rate_limit_error(update, str(e))
-    except AuthenticationError as e:
-        await handle_authentication_error(update, str(e))
-    except UnsupportedMediaError as e:
-        await handle_unsupported_media_error(update, str(e))
-    except NetworkError as e:
-        await handle_network_error(update, str(e))
+        await handler(update, str(error))
     except Exception as e:
-        await handle_general_error(update, str(e))
+        logger.error("Failed to report error to user: %s", e)
     
     # Log the error
-    logger.error(f"Error occurred: {str(context.error)}", exc_info=context.error)
+    logger.error("Error occurred: %s", context.error, exc_info=context.error)
 
 async def handle_invalid_url_error(update: Update, error_message: str):
     """Handle invalid URL errors"""
@@ -93,7 +87,16 @@ async def handle_general_error(update: Update, error_message: str):
         parse_mode=ParseMode.MARKDOWN
     )
 
+ERROR_HANDLERS = {
+    InvalidURLError: handle_invalid_url_error,
+    DownloadError: handle_download_error,
+    RateLimitError: handle_rate_limit_error,
+    AuthenticationError: handle_authentication_error,
+    UnsupportedMediaError: handle_unsupported_media_error,
+    NetworkError: handle_network_error
+}
+
 def log_error(error: Exception):
     """Log errors to file and/or external service"""
-    logger.error(f"An error occurred: {str(error)}", exc_info=error)
+    logger.error("An error occurred: %s", error, exc_info=error)
     # You can add additional logging here, such as sending to an external error tracking service
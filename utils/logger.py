@@ -1,5 +1,6 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import queue
 import sys
 from pathlib import Path
 
@@ -7,7 +8,7 @@ class BotLogger:
     def __init__(self, log_dir: str = 'logs'):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
-        
+
         # Create formatters
         file_formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -19,7 +20,7 @@ class BotLogger:
         # Create handlers
         file_handler = RotatingFileHandler(
             self.log_dir / 'bot.log',
-            maxBytes=1024*1024,  # 1MB
+            maxBytes=16*1024*1024,  # 16MB
             backupCount=5
         )
         file_handler.setFormatter(file_formatter)
@@ -27,11 +28,22 @@ class BotLogger:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(console_formatter)
 
+        # The logger only enqueues records; a listener thread owns the file and console I/O,
+        # so logging from a handler never blocks the event loop
+        self._queue = queue.SimpleQueue()
+        self._listener = QueueListener(
+            self._queue, file_handler, console_handler, respect_handler_level=True
+        )
+        self._listener.start()
+
         # Setup logger
         self.logger = logging.getLogger('MusicDownloaderBot')
         self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.logger.addHandler(QueueHandler(self._queue))
 
     def get_logger(self):
         return self.logger
+
+    def close(self):
+        """Flush queued records and stop the listener thread"""
+        self._listener.stop()
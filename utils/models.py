@@ -360,3 +360,12 @@ class TrackDownloadInfo:
     file_url_headers: Optional[dict] = None
     temp_file_path: Optional[str] = None
     different_codec: Optional[CodecEnum] = None
+
+
+@dataclass
+class DownloadRequest:
+    url: str
+    output_path: str
+    cancelled: bool = False
+    parts: int = 8  # parallel range requests when the server supports them
+    chunk_size: int = 20 * 1024 * 1024  # bytes per range request
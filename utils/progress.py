@@ -1,30 +1,84 @@
 from telegram import Message
 from typing import Optional
 import asyncio
+from tqdm import tqdm
+
+UPDATE_INTERVAL = 2  # seconds between message edits, to stay within Telegram API limits
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 class ProgressTracker:
+    """
+    Edits a message with download progress, at most once per UPDATE_INTERVAL.
+
+    Throttled updates are flushed by a delayed edit, so callers must call finish()
+    once the download ends, before editing the message themselves.
+    """
+
+    # Every possible bar, one per 5% step
+    BARS = tuple('▓' * filled + '░' * (20 - filled) for filled in range(21))
+
     def __init__(self, message: Message, filename: str):
         self.message = message
         self.filename = filename
         self.last_update_time = 0
         self._last_edit_message: Optional[Message] = None
+        self._loop = asyncio.get_running_loop()
+        self._latest = (0, 0)
+        self._flush_task: Optional[asyncio.Task] = None
+        self._total = None
+        self._total_text = ''  # the total rarely changes, so it is formatted once
+        self._finished = False
 
     async def update_progress(self, current: int, total: int):
         """Update download progress message with rate limiting"""
-        now = asyncio.get_event_loop().time()
-        
-        # Update only every 2 seconds to avoid Telegram API limits
-        if now - self.last_update_time < 2:
+        if self._finished:
+            return
+        self._latest = (current, total)
+        if self._flush_task is not None and not self._flush_task.done():
+            return  # the pending edit will pick up the latest numbers
+
+        now = self._loop.time()
+        if now - self.last_update_time < UPDATE_INTERVAL:
+            # Throttled: edit once the interval is up, so the newest numbers still get shown
+            delay = self.last_update_time + UPDATE_INTERVAL - now
+            self._flush_task = self._loop.create_task(self._edit_later(delay))
             return
 
+        await self._edit(now)
+
+    async def finish(self, text: Optional[str] = None):
+        """
+        Stop progress updates, dropping any pending delayed edit so it can't
+        overwrite what comes next; if text is given, show it instead.
+        """
+        self._finished = True
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if text is not None:
+            try:
+                await (self._last_edit_message or self.message).edit_text(text)
+            except Exception:
+                pass
+
+    async def _edit_later(self, delay: float):
+        await asyncio.sleep(delay)
+        await self._edit(self._loop.time())
+
+    async def _edit(self, now: float):
+        """Format the latest progress and edit the message"""
         self.last_update_time = now
+        current, total = self._latest
+        if total != self._total:
+            self._total, self._total_text = total, self._format_size(total)
         percentage = current * 100 / total
         progress_bar = self._generate_progress_bar(percentage)
         
         text = (
             f"Downloading: {self.filename}\n"
             f"{progress_bar} {percentage:.1f}%\n"
-            f"Size: {self._format_size(current)}/{self._format_size(total)}"
+            f"Size: {self._format_size(current)}/{self._total_text}"
         )
 
         try:
@@ -35,17 +89,29 @@ class ProgressTracker:
         except Exception:
             pass
 
-    @staticmethod
-    def _generate_progress_bar(percentage: float) -> str:
+    @classmethod
+    def _generate_progress_bar(cls, percentage: float) -> str:
         """Generate a progress bar string"""
-        filled = int(percentage / 5)
-        return f"{'▓' * filled}{'░' * (20 - filled)}"
+        return cls.BARS[max(0, min(20, int(percentage / 5)))]
 
     @staticmethod
     def _format_size(size: int) -> str:
         """Format size in bytes to human readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024:
-                return f"{size:.1f}{unit}"
-            size /= 1024
-        return f"{size:.1f}TB"
+        size = int(size)
+        if size <= 0:
+            return f"0.0{SIZE_UNITS[0]}"
+        # Every unit is 2**10 of the previous one, so the bit length picks the unit directly
+        unit = min(len(SIZE_UNITS) - 1, (size.bit_length() - 1) // 10)
+        return f"{size / (1 << (10 * unit)):.1f}{SIZE_UNITS[unit]}"
+
+class ProgressBar:
+    """Console progress bar for Downloader; callers batch their updates, so each call is one tqdm refresh"""
+
+    def __init__(self, total: int):
+        self._bar = tqdm(total=total, unit='B', unit_scale=True, unit_divisor=1024)
+
+    async def update(self, size: int):
+        self._bar.update(size)
+
+    def close(self):
+        self._bar.close()
@@ -1,27 +1,62 @@
 import asyncio
-from collections import deque
+import logging
+from typing import Awaitable, List, Optional
+
+logger = logging.getLogger(__name__)
 
 class QueueManager:
     def __init__(self, max_concurrent=3):
-        self.queue = deque()
-        self.active_tasks = set()
         self.max_concurrent = max_concurrent
+        # A fixed pool of workers pulls from the queue; both are created on first use,
+        # inside the running loop
+        self.q: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
 
-    async def add_to_queue(self, coro):
-        await self.queue.append(coro)
-        await self.process_queue()
+    def _start_workers(self):
+        self.q = asyncio.Queue()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrent)]
 
-    async def process_queue(self):
-        while self.queue and len(self.active_tasks) < self.max_concurrent:
-            coro = self.queue.popleft()
-            task = asyncio.create_task(coro)
-            self.active_tasks.add(task)
-            task.add_done_callback(self.task_done)
+    async def add_to_queue(self, coro: Awaitable):
+        """Queue coro to run as soon as one of the max_concurrent workers is free"""
+        if not self.workers:
+            self._start_workers()
+        await self.q.put(coro)
 
-    def task_done(self, task):
-        self.active_tasks.remove(task)
-        asyncio.create_task(self.process_queue())
+    async def _worker(self):
+        while True:
+            coro = await self.q.get()
+            # Run the item as its own task and wait on it without propagating its result:
+            # a CancelledError raised by the item must not kill the worker, while
+            # cancelling the worker itself must still stop it (and the item)
+            job = asyncio.ensure_future(coro)
+            try:
+                await asyncio.wait({job})
+            except asyncio.CancelledError:
+                job.cancel()
+                raise
+            finally:
+                self.q.task_done()
+            if job.cancelled():
+                logger.warning("Queued task was cancelled")
+            elif job.exception() is not None:
+                logger.error("Queued task failed: %r", job.exception())
 
     async def wait_until_complete(self):
-        while self.queue or self.active_tasks:
-            await asyncio.sleep(0.1)
+        """Wait until every queued coroutine has finished, including ones added meanwhile"""
+        if self.q is not None:
+            await self.q.join()
+
+    async def shutdown(self):
+        """Stop the workers; coroutines still waiting in the queue are dropped"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+        if self.q is not None:
+            while not self.q.empty():
+                coro = self.q.get_nowait()
+                if hasattr(coro, 'close'):
+                    coro.close()  # never started, so don't let it warn about not being awaited
+                self.q.task_done()
+            self.q = None
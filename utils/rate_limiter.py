@@ -1,30 +1,52 @@
-from collections import defaultdict
+import asyncio
+from collections import defaultdict, deque
 import time
-from typing import Dict, Tuple
+from typing import Deque, Dict, Tuple
+
+SWEEP_INTERVAL = 60  # seconds between sweeps for idle users
 
 class RateLimiter:
     def __init__(self, max_requests: int = 5, time_window: int = 60):
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests: Dict[int, list] = defaultdict(list)
+        self.requests: Dict[int, Deque[float]] = defaultdict(deque)
+        self._last_sweep = time.monotonic()
 
     def can_proceed(self, user_id: int) -> Tuple[bool, float]:
         """Check if user can proceed with request"""
-        current_time = time.time()
+        current_time = time.monotonic()
+        cutoff = current_time - self.time_window
+        if current_time - self._last_sweep >= SWEEP_INTERVAL:
+            self._sweep(cutoff)
+            self._last_sweep = current_time
+
         user_requests = self.requests[user_id]
-        
-        # Remove old requests
-        user_requests = [req_time for req_time in user_requests 
-                        if current_time - req_time < self.time_window]
-        self.requests[user_id] = user_requests
+
+        # Remove old requests; timestamps are in order so only the front can be stale
+        while user_requests and user_requests[0] <= cutoff:
+            user_requests.popleft()
 
         if len(user_requests) >= self.max_requests:
             wait_time = user_requests[0] + self.time_window - current_time
             return False, wait_time
 
-        self.requests[user_id].append(current_time)
+        user_requests.append(current_time)
         return True, 0
 
+    def _sweep(self, cutoff: float):
+        """Forget users whose newest request has left the window, so memory tracks active users only"""
+        for user_id, user_requests in list(self.requests.items()):
+            if not user_requests or user_requests[-1] <= cutoff:
+                del self.requests[user_id]
+
+    async def acquire(self, user_id: int):
+        """Wait until the user is allowed another request, then count it"""
+        while True:
+            allowed, wait_time = self.can_proceed(user_id)
+            if allowed:
+                return
+            await asyncio.sleep(wait_time)
+
     def reset_user(self, user_id: int):
         """Reset rate limit for a user"""
         if user_id in self.requests:
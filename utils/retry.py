@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional, Tuple, Type
+
+import aiohttp
+
+from .exceptions import NetworkError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# Same status list as the requests session in utils.utils.create_requests_session
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Longest Retry-After that is waited out; when a server asks for more, the error is raised instead
+MAX_RETRY_AFTER = 60.0
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the server's requested delay from a RateLimitError or an HTTP error's Retry-After header"""
+    if isinstance(error, RateLimitError) and error.retry_after is not None:
+        return float(error.retry_after)
+    headers = getattr(error, 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('Retry-After', 0))
+    except (TypeError, ValueError):
+        return None
+
+
+async def retry_async(coro_fn: Callable[..., Awaitable], *args,
+                      retries: int = 5,
+                      base: float = 0.5,
+                      retry_on: Tuple[Type[BaseException], ...] = (),
+                      cap: float = MAX_RETRY_AFTER,
+                      **kwargs):
+    """
+    Await coro_fn(*args, **kwargs), retrying transient failures.
+
+    Connection errors, timeouts and HTTP 429/5xx responses are retried with
+    exponential backoff plus jitter, honouring Retry-After when the server sends it.
+    A Retry-After longer than `cap` seconds is not waited out; the error is raised.
+    Extra exception types to treat as transient can be passed via retry_on.
+    """
+    for attempt in range(retries):
+        try:
+            return await coro_fn(*args, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError, *retry_on) as e:
+            status = getattr(e, 'status', None)
+            if attempt == retries - 1 or (status is not None and status not in RETRY_STATUSES):
+                raise
+
+            retry_after = retry_after_seconds(e) or 0
+            if retry_after > cap:
+                raise
+            delay = max(retry_after, base * 2 ** attempt + random.random() * 0.3)
+            logger.warning("Transient error (%r), retrying in %.1fs (attempt %d/%d)",
+                           e, delay, attempt + 1, retries)
+            await asyncio.sleep(delay)
+
+
+async def aretry(fn: Callable[[], Awaitable],
+                 *,
+                 exceptions: Tuple[Type[BaseException], ...] = (NetworkError, RateLimitError),
+                 max_tries: int = 8,
+                 base: float = 0.5,
+                 cap: float = 30.0):
+    """
+    Await fn() until it succeeds, retrying the given bot errors.
+
+    Waits grow exponentially from `base` up to `cap` with +/-50% jitter, so
+    clients that failed together don't retry together; a RateLimitError's
+    retry_after is used instead when it is set, unless it exceeds `cap`, in
+    which case the error is raised rather than waited out.
+    """
+    for attempt in range(max_tries):
+        try:
+            return await fn()
+        except exceptions as e:
+            if attempt == max_tries - 1:
+                raise
+
+            delay = retry_after_seconds(e)
+            if delay is not None and delay > cap:
+                raise
+            if delay is None:
+                delay = min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.warning("%s, retrying in %.1fs (attempt %d/%d)",
+                           e, delay, attempt + 1, max_tries)
+            await asyncio.sleep(delay)
@@ -1,7 +1,13 @@
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
 import re
+import sys
 from typing import Tuple, Optional, Dict
+import asyncio
 import logging
+import aiohttp
+import cachetools
+from .utils import create_aiohttp_session
 
 logger = logging.getLogger(__name__)
 
@@ -10,46 +16,88 @@ class URLParsingError(Exception):
     pass
 
 class URLParser:
-    # Service URL patterns
+    # Service URL patterns: media type -> ID pattern
     URL_PATTERNS = {
         'tidal': {
             'domains': ['tidal.com', 'listen.tidal.com'],
             'patterns': {
-                'track': r'/track/(\d+)',
-                'album': r'/album/(\d+)',
-                'playlist': r'/playlist/([a-zA-Z0-9-]+)',
-                'artist': r'/artist/(\d+)'
+                'track': r'\d+',
+                'album': r'\d+',
+                'playlist': r'[a-zA-Z0-9-]+',
+                'artist': r'\d+'
             }
         },
         'qobuz': {
             'domains': ['qobuz.com', 'play.qobuz.com', 'open.qobuz.com'],
             'patterns': {
-                'track': r'/track/(\d+)',
-                'album': r'/album/(\d+)',
-                'playlist': r'/playlist/(\d+)',
-                'artist': r'/artist/(\d+)'
+                'track': r'\d+',
+                'album': r'\d+',
+                'playlist': r'\d+',
+                'artist': r'\d+'
             }
         },
         'deezer': {
             'domains': ['deezer.com', 'deezer.page.link'],
             'patterns': {
-                'track': r'/track/(\d+)',
-                'album': r'/album/(\d+)',
-                'playlist': r'/playlist/(\d+)',
-                'artist': r'/artist/(\d+)'
+                'track': r'\d+',
+                'album': r'\d+',
+                'playlist': r'\d+',
+                'artist': r'\d+'
             }
         }
     }
 
+    # One regex per service so the path is scanned once; the named group that matched is the media type.
+    # The greedy prefix makes the last media segment win, so /album/111/track/222 is track 222.
+    MEDIA_PATTERNS = {
+        service: re.compile('^.*/(?:' + '|'.join(
+            f'{media_type}/(?P<{media_type}>{id_pattern})'
+            for media_type, id_pattern in config['patterns'].items()
+        ) + ')')
+        for service, config in URL_PATTERNS.items()
+    }
+
     # Short URL patterns
     SHORT_URL_PATTERNS = {
-        'tidal': r't.co/([a-zA-Z0-9]+)',
-        'qobuz': r'qbz.fm/([a-zA-Z0-9]+)',
-        'deezer': r'deezer.page.link/([a-zA-Z0-9]+)'
+        'tidal': re.compile(r't.co/([a-zA-Z0-9]+)'),
+        'qobuz': re.compile(r'qbz.fm/([a-zA-Z0-9]+)'),
+        'deezer': re.compile(r'deezer.page.link/([a-zA-Z0-9]+)')
     }
 
+    # domain -> service, so a host is resolved with dict lookups instead of scanning every service.
+    # Service names are interned since one is returned and compared for every URL.
+    DOMAIN_TO_SERVICE = {
+        domain: sys.intern(service)
+        for service, config in URL_PATTERNS.items()
+        for domain in config['domains']
+    }
+
+    # Shared HTTP session for expanding short links; set_session() lets the bot inject its own
+    session: Optional[aiohttp.ClientSession] = None
+
+    # The same short links get reposted, so remember where they lead for a while
+    _short_url_cache = cachetools.TTLCache(maxsize=1024, ttl=3600)
+
+    @classmethod
+    def set_session(cls, session: aiohttp.ClientSession):
+        """Use the given session for short URL expansion"""
+        cls.session = session
+
+    @classmethod
+    async def close_session(cls):
+        """Close the short URL session; call at shutdown"""
+        session, cls.session = cls.session, None
+        if session is not None:
+            await session.close()
+
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        if cls.session is None or cls.session.closed:
+            cls.session = create_aiohttp_session(8)
+        return cls.session
+
     @staticmethod
-    def parse_url(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    async def parse_url(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """
         Parse music service URLs and return service, media type, and media ID.
         
@@ -64,31 +112,15 @@ class URLParser:
             URLParsingError: If URL is invalid or unsupported
         """
         try:
-            # Clean and validate URL
-            cleaned_url = URLParser._clean_url(url)
-            if not cleaned_url:
-                raise URLParsingError("Invalid URL format")
-
-            # Handle short URLs
-            if URLParser._is_short_url(cleaned_url):
-                expanded_url = URLParser._expand_short_url(cleaned_url)
-                if expanded_url:
-                    cleaned_url = expanded_url
-
-            # Parse URL
-            parsed_url = urlparse(cleaned_url)
-            
-            # Get service name
-            service = URLParser._identify_service(parsed_url.netloc)
-            if not service:
-                raise URLParsingError(f"Unsupported service domain: {parsed_url.netloc}")
-
-            # Get media type and ID
-            media_type, media_id = URLParser._extract_media_info(service, parsed_url.path)
-            if not media_type or not media_id:
-                raise URLParsingError(f"Could not extract media information from path: {parsed_url.path}")
+            # Short links stay out of the parse cache since where they lead can change; their
+            # expansion is only remembered for the TTL of _short_url_cache
+            if URLParser._is_short_url(url):
+                cleaned_url = URLParser._clean_url(url)
+                if not cleaned_url:
+                    raise URLParsingError("Invalid URL format")
+                url = await URLParser._expand_short_url(cleaned_url) or cleaned_url
 
-            return service, media_type, media_id
+            return _parse_url_cached(url)
 
         except URLParsingError as e:
             logger.warning(f"URL parsing error: {str(e)}")
@@ -120,46 +152,55 @@ class URLParser:
     @staticmethod
     def _identify_service(domain: str) -> Optional[str]:
         """Identify music service from domain"""
-        domain = domain.lower()
-        for service, config in URLParser.URL_PATTERNS.items():
-            if any(d in domain for d in config['domains']):
+        domain = domain.lower().split(':', 1)[0].rstrip('.')
+        # Exact host or a subdomain of a known domain, never a substring:
+        # www.deezer.com -> deezer.com matches, deezer.com.evil.net -> com.evil.net -> evil.net -> net doesn't
+        while domain:
+            service = URLParser.DOMAIN_TO_SERVICE.get(domain)
+            if service:
                 return service
+            domain = domain.partition('.')[2]
         return None
 
     @staticmethod
     def _extract_media_info(service: str, path: str) -> Tuple[Optional[str], Optional[str]]:
         """Extract media type and ID from URL path"""
-        patterns = URLParser.URL_PATTERNS[service]['patterns']
-        
-        for media_type, pattern in patterns.items():
-            match = re.search(pattern, path)
-            if match:
-                return media_type, match.group(1)
-                
+        match = URLParser.MEDIA_PATTERNS[service].match(path)
+        if match:
+            return match.lastgroup, match.group(match.lastgroup)
         return None, None
 
     @staticmethod
     def _is_short_url(url: str) -> bool:
         """Check if URL is a short URL format"""
         for pattern in URLParser.SHORT_URL_PATTERNS.values():
-            if re.search(pattern, url):
+            if pattern.search(url):
                 return True
         return False
 
     @staticmethod
-    def _expand_short_url(url: str) -> Optional[str]:
+    async def _expand_short_url(url: str) -> Optional[str]:
         """Expand short URL to full URL"""
-        import requests
-        
+        expanded_url = URLParser._short_url_cache.get(url)
+        if expanded_url is not None:
+            return expanded_url
+
         try:
-            response = requests.head(url, allow_redirects=True, timeout=5)
-            return response.url if response.status_code == 200 else None
-        except Exception as e:
+            session = URLParser._get_session()
+            async with session.head(url, allow_redirects=True,
+                                    timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status != 200:
+                    return None
+                expanded_url = str(response.url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.warning(f"Failed to expand short URL: {str(e)}")
             return None
 
+        URLParser._short_url_cache[url] = expanded_url
+        return expanded_url
+
     @staticmethod
-    def get_url_info(url: str) -> Dict[str, str]:
+    async def get_url_info(url: str) -> Dict[str, str]:
         """
         Get detailed information about a music URL
         
@@ -170,7 +211,7 @@ class URLParser:
             Dict[str, str]: Dictionary containing URL information
         """
         try:
-            service, media_type, media_id = URLParser.parse_url(url)
+            service, media_type, media_id = await URLParser.parse_url(url)
             
             return {
                 'service': service,
@@ -189,7 +230,7 @@ class URLParser:
             }
 
     @staticmethod
-    def validate_url(url: str) -> bool:
+    async def validate_url(url: str) -> bool:
         """
         Validate if URL is supported
         
@@ -200,12 +241,37 @@ class URLParser:
             bool: True if URL is valid and supported, False otherwise
         """
         try:
-            service, media_type, media_id = URLParser.parse_url(url)
+            service, media_type, media_id = await URLParser.parse_url(url)
             return all([service, media_type, media_id])
         except URLParsingError:
             return False
 
-def parse_url(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+@lru_cache(maxsize=4096)
+def _parse_url_cached(url: str) -> Tuple[str, str, str]:
+    """
+    Parse an already expanded URL into (service_name, media_type, media_id).
+
+    Pure, so results are memoized: the same links get pasted and forwarded over and over.
+    Failures raise URLParsingError and are not cached. Call _parse_url_cached.cache_clear()
+    if URL_PATTERNS change at runtime.
+    """
+    cleaned_url = URLParser._clean_url(url)
+    if not cleaned_url:
+        raise URLParsingError("Invalid URL format")
+
+    parsed_url = urlparse(cleaned_url)
+
+    service = URLParser._identify_service(parsed_url.hostname or '')
+    if not service:
+        raise URLParsingError(f"Unsupported service domain: {parsed_url.netloc}")
+
+    media_type, media_id = URLParser._extract_media_info(service, parsed_url.path)
+    if not media_type or not media_id:
+        raise URLParsingError(f"Could not extract media information from path: {parsed_url.path}")
+
+    return service, media_type, media_id
+
+async def parse_url(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     Convenience function to parse URLs without instantiating URLParser
     
@@ -216,14 +282,9 @@ def parse_url(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         Tuple[Optional[str], Optional[str], Optional[str]]: 
         (service_name, media_type, media_id)
     """
-    return URLParser.parse_url(url)
+    return await URLParser.parse_url(url)
 
-def validate_url(url: str) -> bool:
-    """
-    Convenience function to validate URLs without instantiating URLParser
-    
-    Args:
-        url (strdef validate_url(url: str) -> bool:
+async def validate_url(url: str) -> bool:
     """
     Convenience function to validate URLs without instantiating URLParser
     
@@ -233,9 +294,9 @@ def validate_url(url: str) -> bool:
     Returns:
         bool: True if URL is valid and supported, False otherwise
     """
-    return URLParser.validate_url(url)
+    return await URLParser.validate_url(url)
 
-def get_url_info(url: str) -> Dict[str, str]:
+async def get_url_info(url: str) -> Dict[str, str]:
     """
     Convenience function to get detailed URL info without instantiating URLParser
     
@@ -245,28 +306,37 @@ def get_url_info(url: str) -> Dict[str, str]:
     Returns:
         Dict[str, str]: Dictionary containing URL information
     """
-    return URLParser.get_url_info(url)
+    return await URLParser.get_url_info(url)
 
 # Example usage
 if __name__ == "__main__":
     test_urls = [
         "https://tidal.com/browse/track/12345678",
         "https://listen.tidal.com/album/87654321",
+        "https://listen.tidal.com/album/87654321/track/12345678",
         "https://play.qobuz.com/track/98765432",
         "https://www.deezer.com/en/album/12345678",
         "https://t.co/abcd1234",
         "https://invalid-url.com/track/12345"
     ]
 
-    for url in test_urls:
-        print(f"\nTesting URL: {url}")
-        try:
-            service, media_type, media_id = parse_url(url)
-            print(f"Service: {service}")
-            print(f"Media Type: {media_type}")
-            print(f"Media ID: {media_id}")
-        except URLParsingError as e:
-            print(f"Error: {str(e)}")
+    # A track opened from its album page must resolve to the track, not the album
+    assert _parse_url_cached("https://listen.tidal.com/album/111/track/222") == ('tidal', 'track', '222')
+
+    async def main():
+        for url in test_urls:
+            print(f"\nTesting URL: {url}")
+            try:
+                service, media_type, media_id = await parse_url(url)
+                print(f"Service: {service}")
+                print(f"Media Type: {media_type}")
+                print(f"Media ID: {media_id}")
+            except URLParsingError as e:
+                print(f"Error: {str(e)}")
+
+            print(f"Is Valid: {await validate_url(url)}")
+            print("Detailed Info:", await get_url_info(url))
+
+        await URLParser.close_session()
 
-        print(f"Is Valid: {validate_url(url)}")
-        print("Detailed Info:", get_url_info(url))
+    asyncio.run(main())
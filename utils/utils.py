@@ -19,6 +19,13 @@ def create_requests_session():
     session_.mount('https://', HTTPAdapter(max_retries=retries))
     return session_
 
+def create_aiohttp_session(limit_per_host: int, limit: int = 256, **kwargs):
+    import aiohttp  # only the async bot handlers need aiohttp, keep the CLI free of it
+
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host, ttl_dns_cache=300,
+                                     use_dns_cache=True, enable_cleanup_closed=True)
+    return aiohttp.ClientSession(connector=connector, **kwargs)
+
 sanitise_name = lambda name : re.sub(r'[:]', ' - ', re.sub(r'[\\/*?"<>|$]', '', re.sub(r'[ \t]+$', '', str(name).rstrip()))) if name else ''
 
 